@@ -18,16 +18,28 @@ except ImportError:
     from mpi4pyd import dummyMPI as _MPI
     from mpi4pyd.dummyMPI import *
 from . import _hybrid_comm
-from ._hybrid_comm import *
+from ._hybrid_comm import get_HybridComm_obj
 
 # All declaration
+# Iterating over __dict__ avoids the sorted namespace rebuild dir() does
 __all__ = []
 if(_MPI.__package__ == 'mpi4py'):
-    __all__.extend([prop for prop in dir(_MPI) if not prop.startswith('_')])
+    __all__.extend([prop for prop in vars(_MPI) if prop[:1] != '_'])
 else:
     __all__.extend(_MPI.__all__)
 __all__.extend(_hybrid_comm.__all__)
 
+
+# %% LAZY ATTRIBUTES
+# Obtain the default HybridComm instances on first access (PEP 562)
+def __getattr__(name):
+    if name in ('HYBRID_COMM_SELF', 'HYBRID_COMM_WORLD'):
+        hybrid_comm = getattr(_hybrid_comm, name)
+        globals()[name] = hybrid_comm
+        return(hybrid_comm)
+    raise AttributeError(name)
+
+
 # Name and package declaration
 __name__ = getattr(_MPI, '__name__', None)
 __package__ = getattr(_MPI, '__package__', None)
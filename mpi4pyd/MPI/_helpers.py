@@ -25,4 +25,5 @@ def is_buffer_obj(obj):
     """
 
     # Check if provided obj is a NumPy array
-    return(isinstance(obj, np.ndarray))
+    # The exact type check handles the common case without an MRO walk
+    return(type(obj) is np.ndarray or isinstance(obj, np.ndarray))
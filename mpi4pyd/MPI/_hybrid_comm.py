@@ -9,139 +9,313 @@ HybridComm
 
 # %% IMPORTS
 # Built-in imports
-from inspect import currentframe
+from weakref import WeakValueDictionary, finalize
 
 # Package imports
-import e13tools as e13
 import numpy as np
 
 # mpi4pyd imports
 from mpi4pyd import dummyMPI, MPI
 from mpi4pyd.MPI._helpers import is_buffer_obj
 
+# Optional pkl5 import, which supports objects over the 2 GiB MPI limit
+try:
+    from mpi4py.util import pkl5
+except ImportError:  # pragma: no cover
+    pkl5 = None
+
 # All declaration
 __all__ = ['HYBRID_COMM_SELF', 'HYBRID_COMM_WORLD', 'get_HybridComm_obj']
 
 
 # Initialize hybrid_comm_registry
-hybrid_comm_registry = {}
+# Weak values allow unused HybridComm objects to be garbage collected
+hybrid_comm_registry = WeakValueDictionary()
 
-# Make conversion dict from NumPy dtype to MPI Datatype
-dtype_dict = {
-    'int': MPI.LONG,
-    'int32': MPI.INT,
-    'int64': MPI.LONG,
-    'float': MPI.DOUBLE,
-    'float32': MPI.FLOAT,
-    'float64': MPI.DOUBLE}
+# Initialize set of ids of all created HybridComm instances
+_hybrid_comm_ids = set()
 
+# Initialize cache of all generated HybridComm classes, keyed by comm class
+_hybrid_comm_classes = {}
 
-# %% FUNCTION DEFINITIONS
-# Function factory that returns special HybridComm class instances
-def get_HybridComm_obj(comm=None):
+# Make conversion dict from NumPy typecode to MPI Datatype
+# mpi4py ships this dict covering all primitive dtypes; dummyMPI has none
+try:
+    from mpi4py.MPI import _typedict as dtype_dict
+except ImportError:  # pragma: no cover
+    dtype_dict = {}
+
+# Make tuple of accepted intra-communicator classes, determined at import
+# If mpi4py is not available, MPI exports dummyMPI and one class suffices
+if MPI.Intracomm is dummyMPI.Intracomm:  # pragma: no cover
+    _INTRACOMM_TYPES = (dummyMPI.Intracomm,)
+else:
+    _INTRACOMM_TYPES = (MPI.Intracomm, dummyMPI.Intracomm)
+
+# Set the maximum number of dimensions that fits in a fixed-size header
+_MAX_HEADER_NDIM = 8
+
+# Set the size in bytes below which non-contiguous arrays are pickled
+# Below this, pickling beats making an explicit contiguous copy first
+_CONTIG_COPY_THRESHOLD = 65536
+
+# Set the size in bytes above which node-local broadcasts use shared memory
+_SHM_BCAST_THRESHOLD = 1048576
+
+# Initialize cache of send-side headers, keyed by the lay-out they describe
+# Sent headers are only ever read, so they can be shared between calls
+_header_cache = {}
+
+
+# %% HELPER DEFINITIONS
+# This function checks if obj can be described by a fixed-size header
+def _fits_header(obj):
     """
-    Function factory that returns an instance of the :class:`~HybridComm`
-    class, defined as ``HybridComm(comm.__class__, object)``.
+    Checks if the NumPy array `obj` can be described by a fixed-size buffer
+    header (e.g., its dtype has a code and its ndim fits in the header).
 
-    This :class:`~HybridComm` class wraps the provided :obj:`MPI.Intracomm`
-    instance `comm` and overrides all of its lowercase communication methods
-    (e.g., :meth:`~MPI.Intracomm.bcast`, :meth:`~MPI.Intracomm.gather`,
-    :meth:`~MPI.Intracomm.scatter`, :meth:`~MPI.Intracomm.recv` and
-    :meth:`~MPI.Intracomm.send`) with improved versions. These improved
-    communication methods automatically select the most optimal way of
-    communicating their input arguments.
+    Only bool, integer, float and complex dtypes qualify, as their chars
+    fully describe them. Other dtypes in :obj:`~dtype_dict` (e.g., bytes or
+    datetime64) carry an itemsize or unit that a char cannot round-trip.
 
-    Besides the new method functionalities, the returned instance behaves in
-    the exact same way as the provided `comm` and can easily be used in any
-    algorithm that expects an instance of the :class:`MPI.Intracomm` class.
+    """
 
-    Optional
-    --------
-    comm : :obj:`~MPI.Intracomm` object or None. Default: None
-        The MPI intra-communicator to use as the base for the
-        :obj:`~HybridComm` instance.
-        If *None*, use :obj:`MPI.COMM_WORLD` instead.
+    dtype = obj.dtype
+    return(dtype.kind in 'biufc' and dtype.char in dtype_dict and
+           dtype.isnative and obj.ndim <= _MAX_HEADER_NDIM)
 
-    Returns
-    -------
-    hybrid_comm : :obj:`MPI.Comm` object
-        The provided `comm` which has its lowercase communication methods
-        overridden. If `comm` is *None* or :obj:`MPI.COMM_WORLD`,
-        :obj:`mpi4pyd.MPI.HYBRID_COMM_WORLD` is returned instead.
 
-    Note
-    ----
-    Providing the same :obj:`~MPI.Intracomm` instance to this function twice,
-    will not create two :obj:`~HybridComm` objects. Instead, the instance
-    created the first time will be returned each consecutive time. All created
-    :obj:`~HybridComm` objects are stored in the :obj:`~hybrid_comm_registry`.
+# This function checks if obj should be communicated over the buffer path
+def _use_buffer_path(obj):
+    """
+    Checks if the provided `obj` should be communicated as a buffer object.
 
-    If `comm` has a pool size of `1` (`comm.Get_size == 1`), this function will
-    return :obj:`mpi4pyd.dummyMPI.COMM_WORLD` instead. This is because the
-    dummy MPI intra-communicator is much more efficient than an associated real
-    MPI intra-communicator (as the former uses no communications at all).
+    Besides being a buffer object that fits in a fixed-size header, `obj`
+    must either be C-contiguous or be large enough that making an explicit
+    contiguous copy is still faster than pickling it.
 
     """
 
-    # If comm is None, set it to MPI.COMM_WORLD
-    if comm is None:
-        comm = MPI.COMM_WORLD
-    # Else, check if provided comm is an MPI intra-communicator
-    elif not isinstance(comm, (MPI.Intracomm, dummyMPI.Intracomm)):
-        raise TypeError("Input argument 'comm' must be an instance of "
-                        "the MPI.Intracomm class!")
+    # Check if obj is a buffer object that can be described by a header
+    if not (is_buffer_obj(obj) and _fits_header(obj)):
+        return(False)
 
-    # Check if provided comm has a size of 1
-    if(comm.Get_size() == 1):
-        # If so, return dummyMPI.COMM_WORLD instead
-        return(dummyMPI.COMM_WORLD)
+    # Small non-contiguous arrays are cheaper to pickle than to copy
+    return(obj.flags.c_contiguous or obj.nbytes >= _CONTIG_COPY_THRESHOLD)
 
-    # Check if provided comm already has a HybridComm instance
-    if hex(id(comm)) in hybrid_comm_registry.keys():
-        # If so, return that HybridComm instance instead
-        return(hybrid_comm_registry[hex(id(comm))])
 
-    # Check if provided comm is not already a HybridComm instance
-    if comm in hybrid_comm_registry.values():
-        # If so, return provided HybridComm instance instead
-        return(comm)
+# This function creates a fixed-size header describing a buffer object
+def _make_header(shape=None, dtype=None):
+    """
+    Returns a fixed-size int64 header array describing a buffer object with
+    the provided `shape` and `dtype`.
+    If `shape` is *None*, a cleared header is returned instead, which flags
+    that no buffer object is being communicated.
+
+    """
+
+    # Initialize cleared header
+    hdr = np.zeros(3+_MAX_HEADER_NDIM, dtype=np.int64)
+
+    # If a shape was provided, fill header with buffer flag, dtype and shape
+    if shape is not None:
+        hdr[0] = 1
+        hdr[1] = len(shape)
+        hdr[2] = ord(dtype.char)
+        hdr[3:3+len(shape)] = shape
+
+    # Return hdr
+    return(hdr)
+
+
+# This function returns a cached fixed-size header for a given lay-out
+def _get_header(shape, dtype):
+    """
+    Returns the fixed-size header describing the provided `shape` and
+    `dtype`, reusing a cached header if this lay-out was sent before.
+
+    The returned header is read-only and must only be used for sending.
+
+    """
+
+    # Check if a header for this lay-out was made before
+    key = (shape, dtype.char)
+    hdr = _header_cache.get(key)
+
+    # If not, make it once and cache it read-only
+    if hdr is None:
+        hdr = _make_header(shape, dtype)
+        hdr.setflags(write=False)
+        _header_cache[key] = hdr
 
-    # Make tuple of overridden attributes
-    overridden_attrs = ('__init__', 'bcast', 'gather', 'recv', 'scatter',
-                        'send')
+    # Return hdr
+    return(hdr)
+
+
+# Set the bounds of scalar values that fit in a signed 64-bit header slot
+_INT64_MIN = np.iinfo(np.int64).min
+_INT64_MAX = np.iinfo(np.int64).max
+
+
+# This function creates a fixed-size header carrying a scalar value
+def _make_scalar_header(obj):
+    """
+    Returns a fixed-size int64 header array carrying the provided scalar
+    `obj` (an :class:`~int` or :class:`~float`) in its value slot, which
+    flags that the scalar itself is communicated in the header.
+
+    """
+
+    # Initialize cleared header
+    hdr = np.zeros(3+_MAX_HEADER_NDIM, dtype=np.int64)
+
+    # Fill header with the proper scalar flag and the value itself
+    # Floats are bit-cast into the slot to keep their full precision
+    if(type(obj) is int):
+        hdr[0] = 2
+        hdr[1] = obj
+    else:
+        hdr[0] = 3
+        hdr[1:2].view(np.float64)[0] = obj
+
+    # Return hdr
+    return(hdr)
+
+
+# This function reads a fixed-size header describing a buffer object
+def _read_header(hdr):
+    """
+    Returns the shape and dtype stored in the provided header array `hdr`,
+    or *None* if `hdr` does not describe a buffer object.
+
+    """
+
+    # If the buffer flag is not set, no buffer object is communicated
+    if not hdr[0]:
+        return(None)
+
+    # Else, extract and return the stored shape and dtype
+    ndim = int(hdr[1])
+    return(tuple(hdr[3:3+ndim]), np.dtype(chr(int(hdr[2]))))
+
+
+# Initialize cleared read-only header, reused by all non-buffer send paths
+_CLEARED_HEADER = _make_header()
+_CLEARED_HEADER.setflags(write=False)
+
+
+# %% CLASS FACTORY
+# Class factory that generates a HybridComm class for a given comm class
+def _make_HybridComm_class(comm_class):
+    """
+    Generates and returns the :class:`~HybridComm` class that is used for
+    wrapping instances of the provided `comm_class`.
+
+    The generated class is cached in :obj:`~_hybrid_comm_classes`, such that
+    the class body is only executed once per communicator class instead of
+    once per wrapped communicator instance.
+
+    """
+
+    # Make frozenset of overridden attributes
+    overridden_attrs = frozenset(['__init__', 'bcast', 'gather', 'recv',
+                                  'scatter', 'send', 'Get_rank', 'Get_size',
+                                  'Is_inter', 'Is_intra'])
+
+    # Make frozenset of all attributes of comm_class that are delegated
+    # Precomputing the difference leaves one set lookup per attribute access
+    delegated_attrs = frozenset(dir(comm_class))-overridden_attrs
 
     # %% HYBRIDCOMM CLASS DEFINITION
-    class HybridComm(comm.__class__, object):
+    class HybridComm(comm_class, object):
         """
         Custom :class:`~MPI.Intracomm` class.
 
         """
 
-        def __init__(self):
-            # Bind provided communicator
-            if not hasattr(comm, '_rank'):
-                self._rank = comm.Get_rank()
-            if not hasattr(comm, '_size'):
-                self._size = comm.Get_size()
+        # The instance itself keeps a null comm; comm is wrapped in __init__
+        def __new__(cls, comm):
+            return(super().__new__(cls))
+
+        def __init__(self, comm):
+            # Bind wrapped comm and its properties determined just once
+            # Direct writes bypass the set lookup in the delegation setattr
+            setattr_ = object.__setattr__
+            setattr_(self, '_comm', comm)
+            setattr_(self, '_rank', comm.Get_rank())
+            setattr_(self, '_size', comm.Get_size())
+
+            # Cache other comm-invariant query results determined just once
+            # The comm name can be changed with Set_name, so it stays live
+            setattr_(self, '_is_intra', comm.Is_intra())
+            setattr_(self, '_is_inter', comm.Is_inter())
+
+            # Build dispatch dict of all delegated bound methods of comm
+            # Non-callable attributes stay live and are delegated on access
+            delegate = {}
+            for name in delegated_attrs:
+                try:
+                    attr = getattr(comm, name)
+                except AttributeError:
+                    continue
+                if callable(attr):
+                    delegate[name] = attr
+            setattr_(self, '_delegate', delegate)
+
+            # Initialize cache of packed gather lay-outs seen on this comm
+            setattr_(self, '_gather_layouts', {})
+
+            # Initialize reusable buffer for all received metadata headers
+            # Headers are decoded before the next call can overwrite them
+            setattr_(self, '_recv_header', _make_header())
+
+            # If pkl5 is available, use it for pickled payloads
+            # Unlike plain pickled methods, pkl5 can exceed the 2 GiB limit
+            if pkl5 is not None:
+                setattr_(self, '_pkl_comm', pkl5.Intracomm(comm))
+            else:  # pragma: no cover
+                setattr_(self, '_pkl_comm', comm)
+
+            # Determine if all ranks in comm live on the same node
+            # If so, large broadcasts can go through shared memory instead
+            # Note that Split_type is collective, making __init__ collective
+            try:
+                node_comm = comm.Split_type(MPI.COMM_TYPE_SHARED)
+            except (AttributeError, NotImplementedError):  # pragma: no cover
+                setattr_(self, '_intranode', False)
+            else:
+                setattr_(self, '_intranode',
+                         node_comm.Get_size() == self._size)
+                node_comm.Free()
 
         # If requested attribute is not a method, use comm for getattr
         def __getattribute__(self, name):
-            if name not in overridden_attrs and name in comm.__dir__():
-                return(getattr(comm, name))
+            # Bound methods of comm come from the eager dispatch dict
+            method = object.__getattribute__(self, '_delegate').get(name)
+            if method is not None:
+                return(method)
+            elif name in delegated_attrs:
+                return(getattr(object.__getattribute__(self, '_comm'), name))
             else:
                 return(super().__getattribute__(name))
 
         # If requested attribute is not a method, use comm for setattr
         def __setattr__(self, name, value):
-            if name not in overridden_attrs and name in comm.__dir__():
-                setattr(comm, name, value)
+            if name in delegated_attrs:
+                setattr(object.__getattribute__(self, '_comm'), name, value)
+
+                # Drop any stale dispatch entry for this attribute
+                object.__getattribute__(self, '_delegate').pop(name, None)
             else:
                 super().__setattr__(name, value)
 
         # If requested attribute is not a method, use comm for delattr
         def __delattr__(self, name):
-            if name not in overridden_attrs and name in comm.__dir__():
-                delattr(comm, name)
+            if name in delegated_attrs:
+                delattr(object.__getattribute__(self, '_comm'), name)
+
+                # Drop any stale dispatch entry for this attribute
+                object.__getattribute__(self, '_delegate').pop(name, None)
             else:
                 super().__delattr__(name)
 
@@ -149,13 +323,28 @@ def get_HybridComm_obj(comm=None):
         @property
         def overridden_attrs(self):
             """
-            list of str: List with all attribute names that have been
+            frozenset of str: Set with all attribute names that have been
             overridden by this :obj:`~HybridComm` instance.
 
             """
 
             return(overridden_attrs)
 
+        # %% CACHED QUERY METHODS
+        # These query results never change, so they are cached in __init__
+        # and returned directly instead of calling into the MPI library
+        def Get_rank(self):
+            return(self._rank)
+
+        def Get_size(self):
+            return(self._size)
+
+        def Is_inter(self):
+            return(self._is_inter)
+
+        def Is_intra(self):
+            return(self._is_intra)
+
         # %% COMMUNICATION METHODS
         # Specialized bcast function that automatically makes use of buffers
         def bcast(self, obj, root=0):
@@ -182,34 +371,125 @@ def get_HybridComm_obj(comm=None):
             obj : object
                 The broadcasted `obj`.
 
+            Note
+            ----
+            Only the `obj` provided on the `root` rank is used for
+            determining whether a buffer method can be used. The `obj`
+            provided on all other ranks is ignored.
+
             """
 
-            # Check if obj can be broadcasted as a buffer object
-            use_buffer = use_buffer_meth(obj, root)
+            # Bind wrapped comm locally for this call
+            comm = self._comm
 
-            # If provided object uses a buffer
-            if use_buffer:
-                # Sender
-                if(self._rank == root):
-                    # If so, send shape and dtype of the NumPy array
-                    comm.bcast([obj.shape, obj.dtype], root=root)
+            # Sender
+            if(self._rank == root):
+                # Check if obj can be broadcasted as a buffer object
+                use_buffer = _use_buffer_path(obj)
+
+                # If provided object uses a buffer
+                if use_buffer:
+                    # If so, send fixed-size header with shape and dtype
+                    comm.Bcast(_get_header(obj.shape, obj.dtype), root=root)
 
                     # Then send the NumPy array as a buffer object
-                    comm.Bcast(obj, root=root)
+                    # Large node-local arrays go through shared memory instead
+                    # Using ascontiguousarray is a no-op for contiguous arrays
+                    if(self._intranode and obj.nbytes >= _SHM_BCAST_THRESHOLD):
+                        self._shm_bcast(np.ascontiguousarray(obj), obj.shape,
+                                        obj.dtype, root)
+                    else:
+                        comm.Bcast(np.ascontiguousarray(obj), root=root)
+
+                # Scalar ints and floats fit in the header value slot, so
+                # they are shipped in the header broadcast itself
+                elif((type(obj) is int and _INT64_MIN <= obj <= _INT64_MAX) or
+                     type(obj) is float):
+                    comm.Bcast(_make_scalar_header(obj), root=root)
+
+                # If not, send cleared header and broadcast the normal way
+                else:
+                    comm.Bcast(_CLEARED_HEADER, root=root)
+                    obj = self._pkl_comm.bcast(obj, root=root)
 
-                # Receivers receive NumPy array
+            # Receivers
+            else:
+                # Receive fixed-size header
+                hdr = self._recv_header
+                comm.Bcast(hdr, root=root)
+                flag = int(hdr[0])
+
+                # If sent object uses a buffer
+                if(flag == 1):
+                    # Obtain the shape, dtype and total size of the array
+                    shape, dtype = _read_header(hdr)
+                    nbytes = (int(np.prod(shape, dtype=np.int64)) *
+                              dtype.itemsize)
+
+                    # Large node-local arrays arrive through shared memory
+                    if(self._intranode and nbytes >= _SHM_BCAST_THRESHOLD):
+                        obj = self._shm_bcast(None, shape, dtype, root)
+                    else:
+                        # Create empty NumPy array with given shape and dtype
+                        obj = np.empty(shape, dtype=dtype)
+
+                        # Receive NumPy array
+                        comm.Bcast(obj, root=root)
+
+                # If sent object is a scalar, read it out of the header
+                elif(flag == 2):
+                    obj = int(hdr[1])
+                elif(flag == 3):
+                    obj = float(hdr[1:2].view(np.float64)[0])
+
+                # If not, receive obj the normal way
                 else:
-                    # Create empty NumPy array with given shape and dtype
-                    obj = np.empty(*comm.bcast(None, root=root))
+                    obj = self._pkl_comm.bcast(obj, root=root)
+
+            # Return obj
+            return(obj)
+
+        # Shared-memory bcast helper used on node-local communicators
+        def _shm_bcast(self, obj, shape, dtype, root):
+            """
+            Broadcasts the contiguous NumPy array `obj` provided on `root`
+            through a node-local shared-memory window instead of over the
+            regular broadcast path, and returns the broadcasted array.
+
+            This method must only be called when all ranks share a node.
+
+            """
 
-                    # Receive NumPy array
-                    comm.Bcast(obj, root=root)
+            # Bind wrapped comm locally for this call
+            comm = self._comm
 
-            # If not, broadcast obj the normal way
+            # Allocate a shared window that holds the entire array on root
+            nbytes = int(np.prod(shape, dtype=np.int64))*dtype.itemsize
+            win = MPI.Win.Allocate_shared(
+                nbytes if self._rank == root else 0, dtype.itemsize,
+                comm=comm)
+
+            # Make a NumPy array of the shared memory held by root
+            buf, _ = win.Shared_query(root)
+            shm_arr = np.ndarray(shape, dtype=dtype, buffer=buf)
+
+            # Open a passive-target epoch for the direct load/store accesses
+            win.Lock_all(MPI.MODE_NOCHECK)
+
+            # Root copies its array in; all other ranks copy it out again
+            # Sync orders the direct accesses with respect to the barrier
+            if(self._rank == root):
+                np.copyto(shm_arr, obj)
+                win.Sync()
+                comm.Barrier()
             else:
-                obj = comm.bcast(obj, root=root)
+                comm.Barrier()
+                win.Sync()
+                obj = shm_arr.copy()
 
-            # Return obj
+            # Close the epoch, free the shared window again and return obj
+            win.Unlock_all()
+            win.Free()
             return(obj)
 
         # Specialized gather function that automatically makes use of buffers
@@ -240,47 +520,90 @@ def get_HybridComm_obj(comm=None):
 
             """
 
-            # Check if obj can be gathered as a buffer object
-            use_buffer = use_buffer_meth(sendobj, root)
+            # Bind wrapped comm locally for this call
+            comm = self._comm
 
-            # If all provided objects use buffers
-            if use_buffer:
-                # If so, gather the shapes of obj on the receiver
-                shapes = np.array(comm.gather(sendobj.shape, root=root))
+            # Exchange buffer eligibility and lay-outs in a single collective
+            # Ranks with non-buffer objects contribute None instead
+            layouts = comm.allgather(
+                (sendobj.shape, sendobj.dtype.char)
+                if _use_buffer_path(sendobj) else None)
 
-                # Set the key to use for this communication
-                key = 147418621
+            # Buffers require every rank to provide one with the same dtype
+            # Arrays with differing dtypes cannot share one receive buffer
+            use_buffer = (None not in layouts and
+                          all(layout[1] == layouts[0][1]
+                              for layout in layouts))
 
-                # Receiver sets up a buffer array and receives NumPy array
-                if(self._rank == root):
-                    # Initialize empty list of gathered objects
-                    arr_list = [np.empty(shape, dtype=sendobj.dtype)
-                                for shape in shapes]
-
-                    # Gather all NumPy arrays from all ranks
-                    for rank, arr in enumerate(arr_list):
-                        # If this is the receivers rank, simply copy the data
-                        if(rank == root):
-                            arr[:] = sendobj
-                        # Else, receive the object normally
-                        else:
-                            comm.Recv(arr, source=rank, tag=key+rank)
-
-                    # Save arr_list as recvobj
-                    recvobj = arr_list
-
-                # Senders send the array
+            # If all provided objects use buffers
+            if use_buffer:
+                # Extract all provided shapes
+                shapes = [shape for shape, _ in layouts]
+
+                # Check if all ranks provided equally shaped arrays
+                equal_shapes = (len(set(shapes)) == 1)
+
+                # If so, gather all arrays into one contiguous buffer
+                if equal_shapes:
+                    # Receiver sets up a buffer array for all arrays
+                    if(self._rank == root):
+                        recv_buf = np.empty((self._size, *sendobj.shape),
+                                            dtype=sendobj.dtype)
+
+                        # Deposit own array directly and gather in-place
+                        # This avoids staging root's array a second time
+                        recv_buf[root] = sendobj
+                        comm.Gather(MPI.IN_PLACE, recv_buf, root=root)
+
+                        # Save list of all gathered arrays as recvobj
+                        recvobj = list(recv_buf)
+
+                    # Senders only provide their array
+                    else:
+                        comm.Gather(np.ascontiguousarray(sendobj), None,
+                                    root=root)
+                        recvobj = None
+
+                # If not, gather all arrays into one packed buffer
                 else:
-                    # Send NumPy array
-                    comm.Send(sendobj, dest=root, tag=key+self._rank)
-                    recvobj = None
-
-                # MPI Barrier
-                comm.Barrier()
+                    # Receiver determines the lay-out of the packed buffer
+                    # The lay-out is cached, as iterative codes tend to
+                    # gather the same shapes over and over again
+                    if(self._rank == root):
+                        layout = self._gather_layouts.get(tuple(shapes))
+                        if layout is None:
+                            counts = [int(np.prod(shape, dtype=np.int64))
+                                      for shape in shapes]
+                            displs = np.concatenate(
+                                ([0], np.cumsum(counts[:-1])))
+                            layout = (counts, displs)
+                            self._gather_layouts[tuple(shapes)] = layout
+                        counts, displs = layout
+
+                        # Initialize flat buffer array receiving all arrays
+                        recv_buf = np.empty(sum(counts), dtype=sendobj.dtype)
+
+                        # Deposit own array directly and gather in-place
+                        # This avoids staging root's array a second time
+                        d = int(displs[root])
+                        recv_buf[d:d+counts[root]] = sendobj.ravel()
+                        comm.Gatherv(MPI.IN_PLACE,
+                                     [recv_buf, (counts, displs)], root=root)
+
+                        # Save list of views into recv_buf as recvobj
+                        recvobj = [recv_buf[d:d+c].reshape(shape)
+                                   for d, c, shape in zip(displs.tolist(),
+                                                          counts, shapes)]
+
+                    # Senders only provide their array
+                    else:
+                        comm.Gatherv(np.ascontiguousarray(sendobj), None,
+                                     root=root)
+                        recvobj = None
 
             # If not, gather obj the normal way
             else:
-                recvobj = comm.gather(sendobj, root=root)
+                recvobj = self._pkl_comm.gather(sendobj, root=root)
 
             # Return recvobj
             return(recvobj)
@@ -317,20 +640,27 @@ def get_HybridComm_obj(comm=None):
 
             """
 
-            # Check if a buffer will be used
-            use_buffer = use_buffer_meth(None, source, tag)
+            # Bind wrapped comm locally for this call
+            comm = self._comm
+
+            # Receive the fixed-size header describing the sent object
+            hdr = self._recv_header
+            comm.Recv(hdr, source=source, tag=tag)
+            meta = _read_header(hdr)
+            use_buffer = (meta is not None)
 
             # If to-be-received object uses a buffer, use Recv
             if use_buffer:
                 # Create NumPy array with given shape and dtype
-                recvobj = np.empty(*comm.recv(source=source, tag=tag))
+                recvobj = np.empty(meta[0], dtype=meta[1])
 
                 # Receive NumPy array
                 comm.Recv(recvobj, source=source, tag=tag, status=status)
 
             # If not, receive obj the normal way
             else:
-                recvobj = comm.recv(source=source, tag=tag, status=status)
+                recvobj = self._pkl_comm.recv(source=source, tag=tag,
+                                              status=status)
 
             # Return recvobj
             return(recvobj)
@@ -345,7 +675,7 @@ def get_HybridComm_obj(comm=None):
 
             Unlike :meth:`~MPI.Intracomm.scatter`, providing a buffer object
             with more than :attr:`~_size` items will not raise an error, but
-            evenly distribute all the items instead.
+            distribute all the items as evenly as possible instead.
 
             Parameters
             ----------
@@ -364,46 +694,86 @@ def get_HybridComm_obj(comm=None):
             recvobj : :obj:`~numpy.ndarray` or object
                 The object that has been scattered to this MPI rank.
 
+            Note
+            ----
+            Only the `sendobj` provided on the `root` rank is used for
+            determining whether a buffer method can be used. The `sendobj`
+            provided on all other ranks is ignored.
+
             """
 
-            # Check if obj can be scattered as buffer objects
-            use_buffer = use_buffer_meth(sendobj, root)
+            # Bind wrapped comm locally for this call
+            comm = self._comm
 
-            # If provided object uses a buffer
-            if use_buffer:
-                # Sender prepares for scattering
-                if(self._rank == root):
-                    # Raise error if length of axis is not divisible by size
-                    if len(sendobj) % self._size:  # pragma: no cover
-                        raise e13.ShapeError("Input argument 'sendobj' cannot "
-                                             "be divided evenly over the "
-                                             "available number of MPI ranks!")
+            # Sender
+            if(self._rank == root):
+                # Check if obj can be scattered as buffer objects
+                use_buffer = _use_buffer_path(sendobj)
+
+                # If provided object uses a buffer
+                if use_buffer:
+                    # Send fixed-size header with full shape and dtype
+                    comm.Bcast(_get_header(sendobj.shape, sendobj.dtype),
+                               root=root)
+                    shape = sendobj.shape
+                    dtype = sendobj.dtype
 
-                    # Determine shape of scattered object
-                    buff_shape = list(sendobj.shape)
-                    buff_shape[0] //= self._size
+                # If not, send cleared header and scatter obj the normal way
+                else:
+                    comm.Bcast(_CLEARED_HEADER, root=root)
+                    recvobj = self._pkl_comm.scatter(sendobj, root=root)
 
-                    # Initialize empty buffer array
-                    recvobj = np.empty(
-                        *comm.bcast([buff_shape, sendobj.dtype], root=root))
+            # Receivers
+            else:
+                # Receive fixed-size header
+                hdr = self._recv_header
+                comm.Bcast(hdr, root=root)
+                meta = _read_header(hdr)
+                use_buffer = (meta is not None)
 
-                    # Scatter NumPy array
-                    comm.Scatter(sendobj, recvobj, root=root)
+                # If sent object uses a buffer, obtain its shape and dtype
+                if use_buffer:
+                    shape, dtype = meta
 
-                # Receivers receive the array
+                # If not, receive obj the normal way
                 else:
-                    # Initialize empty buffer array
-                    recvobj = np.empty(*comm.bcast(None, root=root))
+                    recvobj = self._pkl_comm.scatter(sendobj, root=root)
 
-                    # Receive scattered NumPy array
-                    comm.Scatter(None, recvobj, root=root)
+            # If sent object uses a buffer, scatter it with Scatterv
+            if use_buffer:
+                # Determine how many items along axis 0 every rank receives
+                n_div, n_mod = divmod(int(shape[0]), self._size)
+
+                # Determine shape of the block this rank receives
+                buff_shape = list(shape)
+                buff_shape[0] = n_div+(self._rank < n_mod)
+
+                # Initialize empty buffer array with its final shape
+                # The leading axis is dropped up-front if scattering made it
+                # unity; other axes are always left alone
+                if(buff_shape[0] == 1):
+                    recvobj = np.empty(buff_shape[1:], dtype=dtype)
+                    recv_buf = recvobj.reshape(buff_shape)
+                else:
+                    recvobj = np.empty(buff_shape, dtype=dtype)
+                    recv_buf = recvobj
 
-                # Remove single dimensional entries from recvobj
-                recvobj = recvobj.squeeze()
+                # Sender determines counts and displacements of all blocks
+                if(self._rank == root):
+                    n_trail = int(np.prod(shape[1:], dtype=np.int64))
+                    counts = np.full(self._size, n_div*n_trail,
+                                     dtype=np.int64)
+                    counts[:n_mod] += n_trail
+                    displs = np.concatenate(([0], np.cumsum(counts[:-1])))
 
-            # If not, scatter obj the normal way
-            else:
-                recvobj = comm.scatter(sendobj, root=root)
+                    # Scatter NumPy array
+                    comm.Scatterv(
+                        [np.ascontiguousarray(sendobj), counts, displs,
+                         dtype_dict[dtype.char]], recv_buf, root=root)
+
+                # Receivers receive their scattered block
+                else:
+                    comm.Scatterv(None, recv_buf, root=root)
 
             # Return recvobj
             return(recvobj)
@@ -433,79 +803,355 @@ def get_HybridComm_obj(comm=None):
 
             """
 
+            # Bind wrapped comm locally for this call
+            comm = self._comm
+
             # Check if obj can be sent as a buffer object
-            use_buffer = use_buffer_meth(obj, dest, tag)
+            use_buffer = _use_buffer_path(obj)
 
             # If provided object uses a buffer, use Send
             if use_buffer:
-                # Send the shape and dtype of obj to receiver
-                comm.send([obj.shape, obj.dtype], dest=dest, tag=tag)
+                # Send fixed-size header with the shape and dtype of obj
+                comm.Send(_get_header(obj.shape, obj.dtype), dest=dest,
+                          tag=tag)
 
                 # Then send the NumPy array as a buffer object
-                comm.Send(obj, dest=dest, tag=tag)
+                # Using ascontiguousarray is a no-op for contiguous arrays
+                comm.Send(np.ascontiguousarray(obj), dest=dest, tag=tag)
 
-            # If not, send obj the normal way
+            # If not, send cleared header and send obj the normal way
             else:
-                comm.send(obj, dest=dest, tag=tag)
+                comm.Send(_CLEARED_HEADER, dest=dest, tag=tag)
+                self._pkl_comm.send(obj, dest=dest, tag=tag)
 
-    # %% UTILITY FUNCTIONS
-    # This function checks if a buffer communication method can be used
-    def use_buffer_meth(obj, src_dest, tag=0):
-        """
-        Depending on which communication method calls this function,
-        determines if the provided `obj` on all MPI ranks can be
-        communicated using an uppercase communication method.
+        # %% FAST COMMUNICATION METHODS
+        # Fast bcast method that does not communicate any metadata
+        def Bcast_array(self, array, root=0):
+            """
+            Fast broadcast method for NumPy arrays whose shape and dtype are
+            already known on all MPI ranks.
 
-        This function must be called by all MPI ranks that are communicating.
-        This function must never be called directly.
+            Unlike :meth:`~bcast`, no metadata is communicated at all. Every
+            rank must provide a pre-allocated contiguous `array` with the same
+            shape and dtype, which is filled in-place with the array provided
+            on `root`.
 
-        """
+            Parameters
+            ----------
+            array : :obj:`~numpy.ndarray`
+                The array to broadcast on `root`, and the buffer array in
+                which the broadcasted array is received on all other ranks.
+
+            Optional
+            --------
+            root : int. Default: 0
+                The MPI rank that broadcasts `array`.
+
+            Returns
+            -------
+            array : :obj:`~numpy.ndarray`
+                The broadcasted `array`.
+
+            """
+
+            # Broadcast array without any metadata communications
+            self._comm.Bcast(array, root=root)
+
+            # Return array
+            return(array)
+
+        # Fast gather method that does not communicate any metadata
+        def Gather_array(self, array, root=0):
+            """
+            Fast gather method for NumPy arrays whose shape and dtype are
+            already known on all MPI ranks.
+
+            Unlike :meth:`~gather`, no metadata is communicated at all. Every
+            rank must provide an `array` with the same shape and dtype.
+
+            Parameters
+            ----------
+            array : :obj:`~numpy.ndarray`
+                The array to gather from all MPI ranks.
+
+            Optional
+            --------
+            root : int. Default: 0
+                The MPI rank that gathers `array`.
+
+            Returns
+            -------
+            recvobj : list of :obj:`~numpy.ndarray` or None
+                If MPI rank is `root`, returns a list of gathered arrays.
+                Else, returns *None*.
+
+            """
+
+            # Bind wrapped comm locally for this call
+            comm = self._comm
+
+            # Receiver sets up a buffer array for all arrays
+            if(self._rank == root):
+                recv_buf = np.empty((self._size, *array.shape),
+                                    dtype=array.dtype)
+
+                # Deposit own array directly and gather in-place
+                recv_buf[root] = array
+                comm.Gather(MPI.IN_PLACE, recv_buf, root=root)
+
+                # Save list of all gathered arrays as recvobj
+                recvobj = list(recv_buf)
 
-        # Determine the name of the frame calling this method
-        meth_name = currentframe().f_back.f_code.co_name
+            # Senders only provide their array
+            else:
+                comm.Gather(np.ascontiguousarray(array), None, root=root)
+                recvobj = None
+
+            # Return recvobj
+            return(recvobj)
+
+        # Fast scatter method that does not communicate any metadata
+        def Scatter_array(self, array, recvarray, root=0):
+            """
+            Fast scatter method for NumPy arrays whose shape and dtype are
+            already known on all MPI ranks.
+
+            Unlike :meth:`~scatter`, no metadata is communicated at all. The
+            `array` provided on `root` is distributed over the pre-allocated
+            `recvarray` buffers, using the same even distribution along the
+            leading axis as :meth:`~scatter` uses.
+
+            Parameters
+            ----------
+            array : :obj:`~numpy.ndarray`
+                The array to scatter to all MPI ranks. Only used on `root`.
+            recvarray : :obj:`~numpy.ndarray`
+                The buffer array in which the scattered block of this MPI rank
+                is received. Its shape and dtype must match that block.
+
+            Optional
+            --------
+            root : int. Default: 0
+                The MPI rank that scatters `array`.
+
+            Returns
+            -------
+            recvarray : :obj:`~numpy.ndarray`
+                The block of `array` that has been scattered to this MPI rank.
+
+            """
 
-        # Check who called this method and act accordingly
-        # SEND/RECV
-        if meth_name in ('recv', 'send'):
-            # SEND
-            if(meth_name == 'send'):
-                # Determine if this object is a buffer object
-                buff_flag = is_buffer_obj(obj)
+            # Bind wrapped comm locally for this call
+            comm = self._comm
 
-                # Send this to the receiver
-                comm.send(buff_flag, dest=src_dest, tag=tag)
+            # Sender determines counts and displacements of all blocks
+            if(self._rank == root):
+                n_div, n_mod = divmod(int(array.shape[0]), self._size)
+                n_trail = int(np.prod(array.shape[1:], dtype=np.int64))
+                counts = np.full(self._size, n_div*n_trail, dtype=np.int64)
+                counts[:n_mod] += n_trail
+                displs = np.concatenate(([0], np.cumsum(counts[:-1])))
 
-                # Return buff_flag
-                return(buff_flag)
+                # Scatter NumPy array
+                comm.Scatterv(
+                    [np.ascontiguousarray(array), counts, displs,
+                     dtype_dict[array.dtype.char]], recvarray, root=root)
 
-            # RECV
+            # Receivers receive their scattered block
             else:
-                # Receive and return buff_flag
-                return(comm.recv(obj, source=src_dest, tag=tag))
+                comm.Scatterv(None, recvarray, root=root)
+
+            # Return recvarray
+            return(recvarray)
+
+        # Batched bcast method that broadcasts many arrays in one payload
+        def bcast_many(self, arrays, root=0):
+            """
+            Batched broadcast method for sequences of NumPy arrays.
+
+            All arrays provided on `root` are packed into a single byte
+            buffer that is broadcasted at once, instead of paying the fixed
+            per-call broadcast latency for every array separately. This is
+            most effective for many small arrays.
+
+            Parameters
+            ----------
+            arrays : sequence of :obj:`~numpy.ndarray`
+                The arrays to broadcast to all MPI ranks. Only the arrays
+                provided on `root` are used.
+
+            Optional
+            --------
+            root : int. Default: 0
+                The MPI rank that broadcasts `arrays`.
+
+            Returns
+            -------
+            arrays : list of :obj:`~numpy.ndarray`
+                The broadcasted arrays. On all non-root ranks, the returned
+                arrays are views into a single shared byte buffer.
+
+            """
+
+            # Bind wrapped comm locally for this call
+            comm = self._comm
+
+            # Sender
+            if(self._rank == root):
+                # Broadcast the lay-out of all provided arrays at once
+                layout = [(array.shape, array.dtype) for array in arrays]
+                self._pkl_comm.bcast(layout, root=root)
+
+                # Pack all arrays into a single contiguous byte buffer
+                buf = np.concatenate(
+                    [np.ascontiguousarray(array).reshape(-1).view(np.uint8)
+                     for array in arrays]) if arrays else None
 
-        # BCAST/SCATTER
-        elif meth_name in ('bcast', 'scatter'):
-            return(comm.bcast(is_buffer_obj(obj), root=src_dest))
+                # Broadcast the packed buffer in a single call
+                if buf is not None and buf.nbytes:
+                    comm.Bcast(buf, root=root)
 
-        # GATHER
-        elif(meth_name == 'gather'):
-            return(comm.allreduce(is_buffer_obj(obj), op=MPI.MIN))
+                # Save list of all provided arrays as arrays
+                arrays = list(arrays)
+
+            # Receivers
+            else:
+                # Receive the lay-out of all broadcasted arrays
+                layout = self._pkl_comm.bcast(None, root=root)
+
+                # Determine the byte size of every array and of the buffer
+                nbytes = [int(np.prod(shape, dtype=np.int64))*dtype.itemsize
+                          for shape, dtype in layout]
+                buf = np.empty(sum(nbytes), dtype=np.uint8)
+
+                # Receive the packed buffer in a single call
+                if buf.nbytes:
+                    comm.Bcast(buf, root=root)
+
+                # Reconstruct all arrays as views into the received buffer
+                arrays = []
+                offset = 0
+                for (shape, dtype), n in zip(layout, nbytes):
+                    arrays.append(buf[offset:offset+n].view(dtype).reshape(
+                        shape))
+                    offset += n
+
+            # Return arrays
+            return(arrays)
+
+    # Return HybridComm
+    return(HybridComm)
+
+
+# %% FUNCTION DEFINITIONS
+# Function factory that returns special HybridComm class instances
+def get_HybridComm_obj(comm=None):
+    """
+    Function factory that returns an instance of the :class:`~HybridComm`
+    class, defined as ``HybridComm(comm.__class__, object)``.
+
+    This :class:`~HybridComm` class wraps the provided :obj:`MPI.Intracomm`
+    instance `comm` and overrides all of its lowercase communication methods
+    (e.g., :meth:`~MPI.Intracomm.bcast`, :meth:`~MPI.Intracomm.gather`,
+    :meth:`~MPI.Intracomm.scatter`, :meth:`~MPI.Intracomm.recv` and
+    :meth:`~MPI.Intracomm.send`) with improved versions. These improved
+    communication methods automatically select the most optimal way of
+    communicating their input arguments.
+
+    Besides the new method functionalities, the returned instance behaves in
+    the exact same way as the provided `comm` and can easily be used in any
+    algorithm that expects an instance of the :class:`MPI.Intracomm` class.
+
+    Optional
+    --------
+    comm : :obj:`~MPI.Intracomm` object or None. Default: None
+        The MPI intra-communicator to use as the base for the
+        :obj:`~HybridComm` instance.
+        If *None*, use :obj:`MPI.COMM_WORLD` instead.
+
+    Returns
+    -------
+    hybrid_comm : :obj:`MPI.Comm` object
+        The provided `comm` which has its lowercase communication methods
+        overridden. If `comm` is *None* or :obj:`MPI.COMM_WORLD`,
+        :obj:`mpi4pyd.MPI.HYBRID_COMM_WORLD` is returned instead.
+
+    Note
+    ----
+    Providing the same :obj:`~MPI.Intracomm` instance to this function twice,
+    will not create two :obj:`~HybridComm` objects. Instead, the instance
+    created the first time will be returned each consecutive time. All created
+    :obj:`~HybridComm` objects are stored in the :obj:`~hybrid_comm_registry`.
+
+    Creating a new :obj:`~HybridComm` object is collective over `comm`, as it
+    probes whether all ranks in `comm` share a node. Therefore, all ranks in
+    `comm` must call this function together the first time, and the same
+    holds for the first access to the lazily created
+    :obj:`mpi4pyd.MPI.HYBRID_COMM_SELF` and
+    :obj:`mpi4pyd.MPI.HYBRID_COMM_WORLD` instances.
+
+    If `comm` has a pool size of `1` (`comm.Get_size == 1`), this function will
+    return :obj:`mpi4pyd.dummyMPI.COMM_WORLD` instead. This is because the
+    dummy MPI intra-communicator is much more efficient than an associated real
+    MPI intra-communicator (as the former uses no communications at all).
+
+    """
+
+    # If comm is None, set it to MPI.COMM_WORLD
+    if comm is None:
+        comm = MPI.COMM_WORLD
+    # Else, check if provided comm is an MPI intra-communicator
+    elif not isinstance(comm, _INTRACOMM_TYPES):
+        raise TypeError("Input argument 'comm' must be an instance of "
+                        "the MPI.Intracomm class!")
+
+    # Check if provided comm has a size of 1
+    if(comm.Get_size() == 1):
+        # If so, return dummyMPI.COMM_WORLD instead
+        return(dummyMPI.COMM_WORLD)
+
+    # Check if provided comm already has a HybridComm instance
+    # Keying by the comm handle identifies the underlying MPI communicator,
+    # even if it is wrapped by more than one Python object
+    hybrid_comm = hybrid_comm_registry.get(comm.py2f())
+    if hybrid_comm is not None:
+        # If so, return that HybridComm instance instead
+        return(hybrid_comm)
+
+    # Check if provided comm is not already a HybridComm instance
+    if id(comm) in _hybrid_comm_ids:
+        # If so, return provided HybridComm instance instead
+        return(comm)
 
-        # NOT IMPLEMENTED
-        else:  # pragma: no cover
-            raise NotImplementedError
+    # Obtain the HybridComm class for this comm class, generating it once
+    comm_class = comm.__class__
+    hybrid_comm_class = _hybrid_comm_classes.get(comm_class)
+    if hybrid_comm_class is None:
+        hybrid_comm_class = _make_HybridComm_class(comm_class)
+        _hybrid_comm_classes[comm_class] = hybrid_comm_class
 
-    # %% REMAINDER OF FUNCTION FACTORY
     # Initialize HybridComm
-    hybrid_comm = HybridComm()
+    hybrid_comm = hybrid_comm_class(comm)
 
     # Register initialized HybridComm
-    hybrid_comm_registry[hex(id(comm))] = hybrid_comm
+    hybrid_comm_registry[comm.py2f()] = hybrid_comm
+    _hybrid_comm_ids.add(id(hybrid_comm))
+    finalize(hybrid_comm, _hybrid_comm_ids.discard, id(hybrid_comm))
 
     # Return hybrid_comm
     return(hybrid_comm)
 
 
 # %% DEFAULT INSTANCES
-HYBRID_COMM_SELF = get_HybridComm_obj(MPI.COMM_SELF)
-HYBRID_COMM_WORLD = get_HybridComm_obj(MPI.COMM_WORLD)
+# The default instances are created lazily on first access (PEP 562)
+# This way, importing mpi4pyd does not pay for unused HybridComm objects
+def __getattr__(name):
+    if(name == 'HYBRID_COMM_SELF'):
+        hybrid_comm = get_HybridComm_obj(MPI.COMM_SELF)
+        globals()[name] = hybrid_comm
+        return(hybrid_comm)
+    if(name == 'HYBRID_COMM_WORLD'):
+        hybrid_comm = get_HybridComm_obj(MPI.COMM_WORLD)
+        globals()[name] = hybrid_comm
+        return(hybrid_comm)
+    raise AttributeError(name)
@@ -110,10 +110,41 @@ class Test_HybridComm_class(object):
     def test_bcast_array(self, array):
         assert np.allclose(comm.bcast(array, 0), h_comm.bcast(array, 0))
 
+    # Test default broadcast with a non-contiguous array
+    def test_bcast_noncontig_array(self, array):
+        assert np.allclose(comm.bcast(array[:, ::2], 0),
+                           h_comm.bcast(array[:, ::2], 0))
+
+    # Test default broadcast with a large array (shared memory if node-local)
+    def test_bcast_large_array(self):
+        np.random.seed(comm.Get_rank())
+        array = np.random.rand(200, 1000)
+        assert np.allclose(comm.bcast(array, 0), h_comm.bcast(array, 0))
+
+    # Test default broadcast with arrays whose dtype cannot use a buffer
+    def test_bcast_nonnumeric_array(self):
+        b_array = np.array([b'ab', b'cd'], dtype='S2')
+        assert np.all(comm.bcast(b_array, 0) == h_comm.bcast(b_array, 0))
+        t_array = np.arange(5).astype('M8[D]')
+        assert np.all(comm.bcast(t_array, 0) == h_comm.bcast(t_array, 0))
+
+    # Test default broadcast with scalar values
+    def test_bcast_scalar(self):
+        assert h_comm.bcast(rank-100, 0) == comm.bcast(rank-100, 0)
+        assert h_comm.bcast(rank+0.5, 0) == comm.bcast(rank+0.5, 0)
+
     # Test default broadcast with a list
     def test_bcast_list(self, lst):
         assert np.allclose(comm.bcast(lst, 0), h_comm.bcast(lst, 0))
 
+    # Test batched broadcast with several arrays at once
+    def test_bcast_many_arrays(self, array):
+        arrays = [array, array[0], np.arange(5)]
+        b_arrays = h_comm.bcast_many(arrays, 0)
+        for array1, array2 in zip([comm.bcast(a, 0) for a in arrays],
+                                  b_arrays):
+            assert np.allclose(array1, array2)
+
     # Test default gather with an array
     def test_gather_array(self, array):
         g_array1 = comm.gather(array, 0)
@@ -123,6 +154,28 @@ class Test_HybridComm_class(object):
             for array1, array2 in zip(g_array1, g_array2):
                 assert np.allclose(array1, array2)
 
+    # Test default gather with differently shaped arrays
+    def test_gather_unequal_array(self):
+        np.random.seed(comm.Get_rank())
+        array = np.random.rand(rank+1, 10)
+        g_array1 = comm.gather(array, 0)
+        g_array2 = h_comm.gather(array, 0)
+        assert type(g_array1) == type(g_array2)
+        if not rank:
+            for array1, array2 in zip(g_array1, g_array2):
+                assert np.allclose(array1, array2)
+
+    # Test default gather with equally shaped arrays of differing dtypes
+    def test_gather_mixed_dtype_array(self):
+        array = np.arange(10) if rank else np.linspace(0, 1, 10)
+        g_array1 = comm.gather(array, 0)
+        g_array2 = h_comm.gather(array, 0)
+        assert type(g_array1) == type(g_array2)
+        if not rank:
+            for array1, array2 in zip(g_array1, g_array2):
+                assert array1.dtype == array2.dtype
+                assert np.allclose(array1, array2)
+
     # Test default gather with a list
     def test_gather_list(self, lst):
         g_lst1 = comm.gather(lst, 0)
@@ -136,11 +189,43 @@ class Test_HybridComm_class(object):
     def test_scatter_array(self, array):
         assert np.allclose(comm.scatter(array, 0), h_comm.scatter(array, 0))
 
+    # Test scatter with an array that cannot be divided evenly
+    def test_scatter_uneven_array(self):
+        np.random.seed(1313)
+        array = np.random.rand(size+1, 10)
+        s_array = h_comm.scatter(array, 0)
+        if not rank:
+            assert np.allclose(s_array, array[0:2])
+        else:
+            assert np.allclose(s_array, array[rank+1])
+
     # Test default scatter with a list
     def test_scatter_list(self, lst):
         assert np.allclose(comm.scatter(list(lst), 0),
                            h_comm.scatter(list(lst), 0))
 
+    # Test the fast communication methods with pre-agreed metadata
+    def test_fast_array_methods(self, array):
+        # Obtain the array provided on the root rank
+        r_array = comm.bcast(array, 0)
+
+        # Test fast broadcast
+        assert np.allclose(h_comm.Bcast_array(array.copy(), 0), r_array)
+
+        # Test fast gather
+        g_array = h_comm.Gather_array(array, 0)
+        if not rank:
+            for array1, array2 in zip(comm.gather(array, 0), g_array):
+                assert np.allclose(array1, array2)
+        else:
+            comm.gather(array, 0)
+            assert g_array is None
+
+        # Test fast scatter
+        s_array = np.empty((1, 10))
+        h_comm.Scatter_array(array, s_array, 0)
+        assert np.allclose(s_array[0], r_array[rank])
+
     # Test default send/recv with an array
     def test_sendrecv_array(self, array):
         if not rank:
@@ -119,6 +119,9 @@ class Comm(object):
     def Get_size(self):
         return(self.size)
 
+    def py2f(self):
+        return(id(self))
+
     def Allgather(self, sendbuf, recvbuf, *args, **kwargs):
         return(self.Gather(sendbuf, recvbuf))
 
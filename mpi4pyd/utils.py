@@ -19,6 +19,10 @@ __all__ = ['rprint']
 size = MPI.COMM_WORLD.Get_size()
 rank = MPI.COMM_WORLD.Get_rank()
 
+# Determine rank prefix once, as it never changes during a run
+# If using MPI (size > 1), this prefix is prepended to every message
+_RPRINT_PREFIX = ("Rank %i:" % (rank),) if(size > 1) else ()
+
 
 # %% FUNCTION DEFINITIONS
 # Redefine the print function to include the MPI rank if MPI is used
@@ -31,8 +35,4 @@ def rprint(*args, **kwargs):
 
     """
 
-    # If using MPI (size > 1), prepend rank to message
-    if(size > 1):
-        args = list(args)
-        args.insert(0, "Rank %i:" % (rank))
-    print(*args, **kwargs)
+    print(*_RPRINT_PREFIX, *args, **kwargs)
@@ -59,14 +59,12 @@ setup(name='mpi4pyd',
           'Operating System :: Unix',
           'Programming Language :: Python',
           'Programming Language :: Python :: 3',
-          'Programming Language :: Python :: 3.5',
-          'Programming Language :: Python :: 3.6',
           'Programming Language :: Python :: 3.7',
           'Programming Language :: Python :: 3.8',
           'Topic :: Software Development'
           ],
       keywords=('mpi4pyd'),
-      python_requires='>=3.5, <4',
+      python_requires='>=3.7, <4',
       packages=find_packages(),
       package_dir={'mpi4pyd': "mpi4pyd"},
       include_package_data=True,